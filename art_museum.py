@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
-import json
+import collections
+import contextlib
+import importlib.util
+import itertools
 import logging
+import mimetypes
+import os
+import queue
 import random
+import re
 import subprocess
 import threading
 import time
 from datetime import datetime
 from pathlib import Path
 
-from flask import Flask, render_template, request, send_from_directory, abort
-import yaml
+from flask import Flask, Response, render_template, request, send_from_directory, abort
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from waitress import serve
 
 ESP32_ORB_URL = "http://192.168.1.217/state"
 
@@ -21,6 +30,8 @@ BASE_DIR = Path(__file__).resolve().parent
 HOME = Path.home()
 
 ARTISTS_CONFIG_PATH = BASE_DIR / "artists.yaml"
+# artists.yaml baked into Python by tools/freeze_artists.py (optional)
+ARTISTS_DATA_PATH = BASE_DIR / "artists_data.py"
 
 DATA_DIR = BASE_DIR / "data"
 IMAGES_DIR = DATA_DIR / "images"
@@ -28,11 +39,19 @@ IMAGES_DIR = DATA_DIR / "images"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 IMAGES_DIR.mkdir(parents=True, exist_ok=True)
 
-METADATA_PATH = DATA_DIR / "pieces.json"
+# one JSON object per line, appended as pieces are made
+METADATA_PATH = DATA_DIR / "pieces.jsonl"
+# old single-array format, migrated into METADATA_PATH on startup
+LEGACY_METADATA_PATH = DATA_DIR / "pieces.json"
 
 # OnnxStream SD config (SDXL Turbo) – adjust if you changed paths
 SD_BIN = HOME / "OnnxStream" / "src" / "build" / "sd"
 SD_MODELS_DIR = HOME / "onnx_models"  # parent folder you used with --download
+# Extra flags appended to every sd run, e.g. for a custom OnnxStream build
+# or a re-exported (quantized) model set under SD_MODELS_DIR
+SD_EXTRA_ARGS = []
+# sd pins every core; run it niced so web requests still get CPU time
+SD_NICENESS = 10
 
 # 30 minutes between new pieces
 GENERATION_INTERVAL_SECONDS = 30 * 60
@@ -40,10 +59,19 @@ GENERATION_INTERVAL_SECONDS = 30 * 60
 # llama.cpp server endpoint
 LLAMA_SERVER_URL = "http://127.0.0.1:8080/v1/chat/completions"
 
+# When nginx sits in front (see README), set this to its `internal` location,
+# e.g. "/_images/", and image bytes are sent by nginx instead of Python.
+IMAGES_ACCEL_PREFIX = None
+
 # ESP32 orb endpoint (your LCD eye)
 ORB_BASE_URL = "http://192.168.1.216"
 ORB_STATE_URL = f"{ORB_BASE_URL}/state"
 
+# Shared keep-alive pool for the orb and llama-server, so repeated posts
+# skip the TCP handshake (the orb only gets a 1-2s timeout over Wi-Fi).
+HTTP = requests.Session()
+HTTP.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+
 logging.basicConfig(
     level=logging.INFO,
     format="[%(asctime)s] %(levelname)s %(message)s",
@@ -52,9 +80,35 @@ logging.basicConfig(
 # ----------------- ARTIST CONFIG -----------------
 
 
-def load_artists_config():
+def _read_artists_config():
+    """
+    Prefer the frozen artists_data.py (plain import, no YAML parse).
+    Fall back to artists.yaml when there is no frozen copy or it is older
+    than the YAML, i.e. while editing artists.
+    """
+    if ARTISTS_DATA_PATH.exists() and (
+        not ARTISTS_CONFIG_PATH.exists()
+        or ARTISTS_DATA_PATH.stat().st_mtime >= ARTISTS_CONFIG_PATH.stat().st_mtime
+    ):
+        # load this exact file, not whatever "artists_data" is on sys.path
+        try:
+            spec = importlib.util.spec_from_file_location("artists_data", ARTISTS_DATA_PATH)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module.ARTISTS_CONFIG
+        except Exception as e:
+            logging.warning("Could not load artists_data.py (%s); using the YAML", e)
+    elif ARTISTS_DATA_PATH.exists():
+        logging.info("artists_data.py is older than artists.yaml; using the YAML")
+
+    import yaml
+
     with ARTISTS_CONFIG_PATH.open("r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
+        return yaml.safe_load(f)
+
+
+def load_artists_config():
+    cfg = _read_artists_config()
     artists_list = cfg.get("artists", [])
     artists_by_id = {a["id"]: a for a in artists_list}
     selection = cfg.get("selection", {}) or {}
@@ -63,6 +117,10 @@ def load_artists_config():
 
 ARTISTS_CONFIG, ARTISTS_BY_ID, ARTIST_SELECTION = load_artists_config()
 
+# weighted_random inputs, built once instead of on every choose_artist call
+ARTIST_LIST = list(ARTISTS_BY_ID.values())
+ARTIST_CUMWEIGHTS = list(itertools.accumulate(a.get("weight", 1) for a in ARTIST_LIST))
+
 
 def choose_artist(requested_id=None):
     """
@@ -86,28 +144,54 @@ def choose_artist(requested_id=None):
         return ARTISTS_BY_ID.get(default_id, next(iter(ARTISTS_BY_ID.values())))
 
     # weighted_random (default)
-    artists = list(ARTISTS_BY_ID.values())
-    weights = [a.get("weight", 1) for a in artists]
-    return random.choices(artists, weights=weights, k=1)[0]
+    return random.choices(ARTIST_LIST, cum_weights=ARTIST_CUMWEIGHTS, k=1)[0]
 
 
 # ----------------- ORB / ESP32 STATE -----------------
 
+# Orb posts are handed to daemon threads so a slow or dead ESP32 never
+# stalls generation or page views. Items: (url, payload, timeout).
+# Page views may be dropped when the orb can't keep up; generation states
+# (a handful per piece) get their own unbounded queue so they never are.
+ORB_QUEUE = queue.Queue(maxsize=16)
+ORB_STATE_QUEUE = queue.Queue()
+
+
+def _orb_worker(q):
+    while True:
+        url, payload, timeout = q.get()
+        try:
+            # ESP32 handler already expects JSON in the body
+            resp = HTTP.post(url, json=payload, timeout=timeout)
+            if resp.status_code != 200:
+                logging.warning(
+                    "Orb state update non-200 (%s): %s",
+                    resp.status_code,
+                    resp.text[:200],
+                )
+        except Exception as e:
+            logging.warning(
+                "Failed to update orb state (%s, %s): %s",
+                payload["artist_id"],
+                payload["state"],
+                e,
+            )
+
+
+def _queue_orb_state(q, url, artist_id, state, timeout):
+    try:
+        q.put_nowait((url, {"artist_id": artist_id, "state": state}, timeout))
+    except queue.Full:
+        logging.debug("Orb queue full, dropping %s/%s", artist_id, state)
+
+
 def send_orb_state(artist_id: str, state: str = "FINISHED") -> None:
     """
     Notify the ESP32 orb which artist + state should be shown.
     artist_id: e.g. 'pierre', 'inkwell', 'deco9', 'bathys', 'mycelia'
     state: one of: FINISHED, THINKING, DRAWING, DONE
     """
-    try:
-        payload = {"artist_id": artist_id, "state": state}
-        # ESP32 handler already expects JSON in the body
-        r = requests.post(ESP32_ORB_URL, json=payload, timeout=1.0)
-        if r.status_code != 200:
-            logging.warning("Orb returned %s: %s", r.status_code, r.text[:200])
-    except Exception as e:
-        logging.warning("Failed to update orb state: %s", e)
-
+    _queue_orb_state(ORB_QUEUE, ESP32_ORB_URL, artist_id, state, timeout=1.0)
 
 
 def update_orb_state(artist_id: str, state: str) -> None:
@@ -117,29 +201,21 @@ def update_orb_state(artist_id: str, state: str) -> None:
     artist_id: "pierre", "inkwell", etc.
     state: one of "FINISHED", "THINKING", "DRAWING", "DONE"
     """
-    payload = {"artist_id": artist_id, "state": state}
-    try:
-        # small timeout so a dead orb never blocks generation
-        resp = requests.post(ORB_STATE_URL, json=payload, timeout=2)
-        if resp.status_code != 200:
-            logging.warning(
-                "Orb state update non-200 (%s): %s",
-                resp.status_code,
-                resp.text[:200],
-            )
-    except Exception as e:
-        logging.warning("Failed to update orb state (%s, %s): %s", artist_id, state, e)
+    # small timeout so a dead orb never backs up the queue for long
+    _queue_orb_state(ORB_STATE_QUEUE, ORB_STATE_URL, artist_id, state, timeout=2)
 
 
 # ----------------- LLM HELPERS -----------------
 
+# "TITLE: ..." / "SCENE: ..." lines in the scene call's reply
+_TITLE_SCENE_RE = re.compile(
+    r"^[ \t]*(TITLE|SCENE)[ \t]*:[ \t]*(.*?)[ \t\r]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
 
-def _llama_chat(system, user, max_tokens=200):
-    """
-    Call llama-server over HTTP and return the assistant's text.
-    Uses the OpenAI-compatible /v1/chat/completions endpoint.
-    """
-    payload = {
+
+def _llama_payload(system, user, max_tokens):
+    return {
         "model": "default",  # llama-server's default model
         "messages": [
             {"role": "system", "content": system},
@@ -149,15 +225,71 @@ def _llama_chat(system, user, max_tokens=200):
         "temperature": 0.8,
         "presence_penalty": 0.0,
         "frequency_penalty": 0.0,
+        # llama.cpp: keep the KV cache of the shared prefix (the artist's
+        # system prompt) so only the short user message is re-evaluated
+        "cache_prompt": True,
     }
 
-    resp = requests.post(LLAMA_SERVER_URL, json=payload, timeout=600)
+
+def _llama_chat(system, user, max_tokens=200):
+    """
+    Call llama-server over HTTP and return the assistant's text.
+    Uses the OpenAI-compatible /v1/chat/completions endpoint.
+    """
+    payload = _llama_payload(system, user, max_tokens)
+
+    resp = HTTP.post(
+        LLAMA_SERVER_URL,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=600,
+    )
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
     content = data["choices"][0]["message"]["content"]
     return content.strip()
 
 
+def _llama_stream(system, user, max_tokens=200):
+    """
+    Like _llama_chat, but streams the reply and yields text as it arrives.
+    Closing the generator early drops the connection, which makes
+    llama-server stop generating.
+    """
+    payload = _llama_payload(system, user, max_tokens)
+    payload["stream"] = True
+
+    with HTTP.post(
+        LLAMA_SERVER_URL,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=600,
+        stream=True,
+    ) as resp:
+        resp.raise_for_status()
+        # server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+        for line in resp.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            delta = orjson.loads(data)["choices"][0].get("delta") or {}
+            if delta.get("content"):
+                yield delta["content"]
+
+
+def _scene_reply_complete(text):
+    """True once text has a TITLE line and a finished, non-empty SCENE line."""
+    text = text[: text.rfind("\n") + 1]  # only lines that have ended
+    found = {
+        m.group(1).upper()
+        for m in _TITLE_SCENE_RE.finditer(text)
+        if m.group(2) or m.group(1).upper() == "TITLE"
+    }
+    return found == {"TITLE", "SCENE"}
+
+
 def run_llm(artist):
     """
     High-level orchestrator for a single artist:
@@ -173,17 +305,25 @@ def run_llm(artist):
     # --------- Call 1: TITLE + SCENE (no style words) ---------
     scene_user = "Invent one new artwork now. Follow the format exactly."
 
-    raw_scene = _llama_chat(scene_system, scene_user, max_tokens=200)
+    # Stream it and hang up as soon as TITLE and SCENE are in: the parser
+    # ignores anything after them, so the commentary call can start now.
+    raw_scene = ""
+    with contextlib.closing(
+        _llama_stream(scene_system, scene_user, max_tokens=200)
+    ) as chunks:
+        for chunk in chunks:
+            raw_scene += chunk
+            if _scene_reply_complete(raw_scene):
+                break
 
     title = "UNTITLED"
     scene = ""
 
-    for line in raw_scene.splitlines():
-        u = line.strip()
-        if u.upper().startswith("TITLE:"):
-            title = u.split(":", 1)[1].strip() or "UNTITLED"
-        elif u.upper().startswith("SCENE:"):
-            scene = u.split(":", 1)[1].strip()
+    for m in _TITLE_SCENE_RE.finditer(raw_scene):
+        if m.group(1).upper() == "TITLE":
+            title = m.group(2) or "UNTITLED"
+        else:
+            scene = m.group(2)
 
     if not scene:
         logging.warning("Could not parse SCENE from LLM output; using raw text.")
@@ -216,34 +356,122 @@ def run_llm(artist):
 # ----------------- METADATA HELPERS -----------------
 
 
+# Parsed pieces.jsonl, reused until the file's mtime changes.
+_pieces_cache = None
+_pieces_mtime = -1
+
+
 def load_pieces():
-    if not METADATA_PATH.exists():
+    """Return all pieces, oldest first. Callers must not mutate the list."""
+    global _pieces_cache, _pieces_mtime
+
+    try:
+        mtime = METADATA_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
         return []
+    if mtime == _pieces_mtime and _pieces_cache is not None:
+        return _pieces_cache
+
+    data = []
     try:
-        with METADATA_PATH.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        if not isinstance(data, list):
-            return []
-        # sort by created_at just in case
-        return sorted(
-            data,
-            key=lambda p: p.get("created_at", ""),
-        )
+        with METADATA_PATH.open("rb") as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data.append(orjson.loads(line))
+                except ValueError:
+                    # e.g. a half-written last line after a power cut
+                    logging.warning("Skipping bad line %d in pieces.jsonl", lineno)
     except Exception as e:
-        logging.error("Failed to load pieces.json: %s", e)
+        logging.error("Failed to load pieces.jsonl: %s", e)
         return []
 
+    # pieces are only ever appended, so file order is creation order
+    if __debug__ and any(
+        a.get("created_at", "") > b.get("created_at", "") for a, b in zip(data, data[1:])
+    ):
+        logging.warning("pieces.jsonl is not in created_at order")
+
+    _pieces_cache, _pieces_mtime = data, mtime
+    return data
+
+
+def append_piece(piece):
+    """Append one piece to pieces.jsonl without rewriting the rest."""
+    global _pieces_cache
+
+    with METADATA_PATH.open("ab") as f:
+        # if the last write was torn (no trailing newline), start a fresh
+        # line so this piece isn't glued onto the fragment and lost too
+        if f.tell() > 0:
+            with METADATA_PATH.open("rb") as r:
+                r.seek(-1, os.SEEK_END)
+                if r.read(1) != b"\n":
+                    f.write(b"\n")
+        f.write(orjson.dumps(piece, option=orjson.OPT_APPEND_NEWLINE))
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Let the next load_pieces reparse. Extending the cache here could race
+    # with a page view that already read the new line under the old mtime.
+    _pieces_cache = None
+
 
 def save_pieces(pieces):
+    """Rewrite pieces.jsonl from scratch. Only for rare edits like deletions."""
+    global _pieces_cache, _pieces_mtime
+
     tmp = METADATA_PATH.with_suffix(".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(pieces, f, ensure_ascii=False, indent=2)
+    with tmp.open("wb") as f:
+        for p in pieces:
+            f.write(orjson.dumps(p, option=orjson.OPT_APPEND_NEWLINE))
+        f.flush()
+        os.fsync(f.fileno())
     tmp.replace(METADATA_PATH)
 
+    _pieces_cache, _pieces_mtime = pieces, METADATA_PATH.stat().st_mtime_ns
+
+
+def migrate_legacy_pieces():
+    """
+    One-time move from pieces.json (a single JSON array) to pieces.jsonl.
+    The old file is kept as pieces.json.bak.
+    """
+    if METADATA_PATH.exists() or not LEGACY_METADATA_PATH.exists():
+        return
+    try:
+        data = orjson.loads(LEGACY_METADATA_PATH.read_bytes())
+    except Exception as e:
+        logging.error("Failed to read legacy pieces.json: %s", e)
+        return
+    if not isinstance(data, list):
+        data = []
+
+    # the only place order is fixed up; after this pieces are append-only
+    data.sort(key=lambda p: p.get("created_at", ""))
+    save_pieces(data)
+    LEGACY_METADATA_PATH.replace(LEGACY_METADATA_PATH.with_suffix(".json.bak"))
+    logging.info("Migrated %d pieces from pieces.json to pieces.jsonl", len(data))
+
 
 # ----------------- DIFFUSION -----------------
 
 
+def _drain_pipe(pipe, tail, limit=4096):
+    """
+    Read a binary pipe to EOF in fixed-size chunks, keeping only the last
+    `limit` bytes in the bytearray tail. Chunked reads keep memory bounded
+    even if the output has no newlines (e.g. \r progress bars).
+    """
+    while True:
+        chunk = pipe.read1(4096)
+        if not chunk:
+            break
+        tail += chunk
+        del tail[:-limit]
+
+
 def run_sd(image_prompt, out_path):
     """Run OnnxStream SDXL Turbo to generate an image."""
     out_path = out_path.resolve()
@@ -264,18 +492,33 @@ def run_sd(image_prompt, out_path):
         "512x512",
         "--output",
         str(out_path),
+        *SD_EXTRA_ARGS,
     ]
 
     logging.info("Calling SDXL Turbo via OnnxStream…")
-    proc = subprocess.run(
+    proc = subprocess.Popen(
         cmd,
-        text=True,
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
     )
-
-    if proc.returncode != 0:
-        logging.error("sd stderr: %s", proc.stderr[:500])
-        raise RuntimeError(f"sd failed: {proc.stderr[:500]}")
+    try:
+        os.setpriority(os.PRIO_PROCESS, proc.pid, SD_NICENESS)
+    except OSError as e:
+        logging.warning("Could not lower sd priority: %s", e)
+
+    # Drain stderr as it comes so the pipe never fills up and stalls sd;
+    # only the tail is kept for error reporting.
+    stderr_tail = bytearray()
+    drain = threading.Thread(target=_drain_pipe, args=(proc.stderr, stderr_tail), daemon=True)
+    drain.start()
+    returncode = proc.wait()
+    drain.join()
+    proc.stderr.close()
+
+    if returncode != 0:
+        stderr = stderr_tail.decode("utf-8", errors="replace")[-500:]
+        logging.error("sd stderr: %s", stderr)
+        raise RuntimeError(f"sd failed: {stderr}")
 
     if not out_path.exists():
         raise RuntimeError(f"sd claimed success but {out_path} does not exist")
@@ -286,29 +529,32 @@ def run_sd(image_prompt, out_path):
 # ----------------- GENERATION PIPELINE -----------------
 
 
-def generate_piece(artist):
+def generate_piece(artist, meta, on_drawing=None):
     """
-    End-to-end for a given artist:
-      LLM -> SDXL -> save metadata -> return piece dict.
+    Second half of a piece for a given artist, after run_llm:
+      SDXL -> save metadata -> return piece dict.
 
     Tracks artist_id and stores images under data/images/<folder_prefix>/...
-    Also drives the ESP32 orb's state machine.
+    Also drives the ESP32 orb's DRAWING/DONE states (worker_loop sends
+    THINKING when it runs the LLM itself; prefetched pieces skip it).
+
+    meta: output of run_llm(artist).
+    on_drawing: called right before SD starts, so the caller can overlap
+    the next artist's LLM work with this (much longer) SD run.
     """
     artist_id = artist["id"]
     folder_prefix = artist.get("folder_prefix", artist_id)
     artist_img_dir = IMAGES_DIR / folder_prefix
     artist_img_dir.mkdir(parents=True, exist_ok=True)
 
-    # --- STATE: THINKING (LLM) ---
-    update_orb_state(artist_id, "THINKING")
-    meta = run_llm(artist)
-
     ts = int(time.time())
     filename = f"{ts}.png"
     image_path = artist_img_dir / filename
 
     # --- STATE: DRAWING (SD) ---
     update_orb_state(artist_id, "DRAWING")
+    if on_drawing is not None:
+        on_drawing()
     run_sd(meta["image_prompt"], image_path)
 
     piece = {
@@ -322,9 +568,7 @@ def generate_piece(artist):
         "image_filename": f"{folder_prefix}/{filename}",
     }
 
-    pieces = load_pieces()
-    pieces.append(piece    )
-    save_pieces(pieces)
+    append_piece(piece)
 
     logging.info("New piece generated: [%s] %s", artist_id, piece["title"])
 
@@ -337,14 +581,56 @@ def generate_piece(artist):
 # ----------------- BACKGROUND WORKER -----------------
 
 
+def _prefetch_llm(slot):
+    """Thread target: run_llm for slot["artist"], result in slot["meta"]/["error"]."""
+    try:
+        slot["meta"] = run_llm(slot["artist"])
+    except Exception as e:
+        slot["error"] = e
+    finally:
+        slot["done"].set()
+
+
 def worker_loop():
     # On startup, small delay so everything else can boot
     time.sleep(5)
+
+    # llama-server and the sd binary don't compete for much, so the next
+    # artist's LLM run happens in a daemon thread while the current piece
+    # is drawing (daemon so it never holds up shutdown).
+    upcoming = None  # one-slot holder for the next piece, see _prefetch_llm
+    retry = None  # (artist, meta) of a piece whose SD step failed
+
+    def prefetch():
+        nonlocal upcoming
+        upcoming = {"artist": choose_artist(), "done": threading.Event()}
+        threading.Thread(target=_prefetch_llm, args=(upcoming,), daemon=True).start()
+
     while True:
-        artist = choose_artist()
+        meta = None
+        retrying = retry is not None
+        if retrying:
+            artist, meta = retry
+            retry = None
+        elif upcoming is not None:
+            upcoming["done"].wait()
+            artist, meta = upcoming["artist"], upcoming.get("meta")
+            if "error" in upcoming:
+                logging.error("Prefetched LLM run failed: %s", upcoming["error"])
+            upcoming = None
+        else:
+            artist = choose_artist()
+
         try:
             logging.info("Starting generation for artist %s", artist["id"])
-            generate_piece(artist)
+            # --- STATE: THINKING (LLM), unless it was prefetched ---
+            if meta is None:
+                update_orb_state(artist["id"], "THINKING")
+                meta = run_llm(artist)
+            # a retried piece may already have its successor prefetched
+            generate_piece(
+                artist, meta, on_drawing=prefetch if upcoming is None else None
+            )
         except Exception as e:
             logging.error("Error in generation loop: %s", e)
             #  make sure orb doesn't stay stuck.
@@ -352,6 +638,11 @@ def worker_loop():
                 update_orb_state(artist["id"], "FINISHED")
             except Exception:
                 pass
+            # The LLM part worked but SD/saving didn't: retry once with the
+            # same title, scene and commentary instead of throwing them away.
+            if meta is not None and not retrying:
+                logging.info("Retrying [%s] %s next cycle", artist["id"], meta["title"])
+                retry = (artist, meta)
         time.sleep(GENERATION_INTERVAL_SECONDS)
 
 
@@ -359,6 +650,12 @@ def worker_loop():
 
 app = Flask(__name__, template_folder="templates")
 
+# Rendered gallery pages, LRU by (pieces mtime, total, index). A new piece
+# changes the mtime, so stale pages just stop being hit and age out.
+RENDER_CACHE_SIZE = 64
+_render_cache = collections.OrderedDict()
+_render_cache_lock = threading.Lock()
+
 
 @app.route("/")
 def index():
@@ -391,7 +688,14 @@ def index():
         # Don't break the page if the orb is offline
         logging.debug("Could not update orb for viewing state", exc_info=True)
 
-    return render_template(
+    key = (_pieces_mtime, total, idx)
+    with _render_cache_lock:
+        html = _render_cache.get(key)
+        if html is not None:
+            _render_cache.move_to_end(key)
+            return html
+
+    html = render_template(
         "gallery.html",
         current_piece=piece,
         current_artist=artist,
@@ -401,23 +705,46 @@ def index():
         has_next=(idx < total - 1),
     )
 
+    with _render_cache_lock:
+        _render_cache[key] = html
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return html
+
 
 @app.route("/images/<path:filename>")
 def images(filename):
-    # basic safety 
-    path_obj = Path(filename)
-    if ".." in path_obj.parts:
+    # resolve once (follows symlinks) and make sure we're still under IMAGES_DIR
+    base = IMAGES_DIR.resolve()
+    try:
+        target = (base / filename).resolve()
+    except (ValueError, OSError):
+        # e.g. an embedded NUL byte
+        abort(400)
+    if os.path.commonpath([base, target]) != str(base):
         abort(400)
-    return send_from_directory(IMAGES_DIR, filename)
+    rel_path = target.relative_to(base).as_posix()
+    if IMAGES_ACCEL_PREFIX:
+        return Response(
+            mimetype=mimetypes.guess_type(rel_path)[0],
+            headers={"X-Accel-Redirect": f"{IMAGES_ACCEL_PREFIX}{rel_path}"},
+        )
+    return send_from_directory(base, rel_path)
 
 
 def main():
+    migrate_legacy_pieces()
+
+    # Start orb sender before anything that wants to talk to it
+    threading.Thread(target=_orb_worker, args=(ORB_QUEUE,), daemon=True).start()
+    threading.Thread(target=_orb_worker, args=(ORB_STATE_QUEUE,), daemon=True).start()
+
     # Start background generation thread
     t = threading.Thread(target=worker_loop, daemon=True)
     t.start()
 
-    # Run Flask
-    app.run(host="0.0.0.0", port=8000)
+    # Serve Flask with a few threads so viewers don't queue behind each other
+    serve(app, host="0.0.0.0", port=8000, threads=4)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Bake artists.yaml into artists_data.py so art_museum.py can import the
+config instead of parsing YAML on every start.
+
+Re-run after editing artists.yaml (art_museum.py falls back to the YAML
+while the frozen copy is older than it).
+"""
+import pprint
+from pathlib import Path
+
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARTISTS_CONFIG_PATH = BASE_DIR / "artists.yaml"
+ARTISTS_DATA_PATH = BASE_DIR / "artists_data.py"
+
+
+def main():
+    with ARTISTS_CONFIG_PATH.open("r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+
+    body = pprint.pformat(cfg, indent=1, width=100, sort_dicts=False)
+    ARTISTS_DATA_PATH.write_text(
+        "# Generated from artists.yaml by tools/freeze_artists.py -- do not edit.\n"
+        f"ARTISTS_CONFIG = {body}\n",
+        encoding="utf-8",
+    )
+    print(f"Wrote {ARTISTS_DATA_PATH}")
+
+
+if __name__ == "__main__":
+    main()